@@ -1,25 +1,168 @@
 from Bio import Entrez
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import re
+import os
 import textwrap
 from datetime import datetime, timedelta
 from IPython.display import HTML, display
 import time
-from urllib.error import HTTPError
+import random
+import sqlite3
+import zlib
+from contextlib import closing
+from itertools import chain
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+import threading
+from functools import wraps
+from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# orjson is optional but decodes the large API payloads several times faster
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # HTML color codes
 GREEN = "#92C353"
 YELLOW = "#F2C94C"
 RED = "#E57373"
 
-# Global variables to store API links
-pubmed_api_link = ""
-preprint_api_link = ""
-researchsquare_api_link = ""
+# Attribution for batched PubMed hits whose text contains none of the queries
+PUBMED_EXPANDED_MATCH = "PubMed (expanded match)"
 
-def search_pubmed(query, page, results_per_page, max_retries=3, initial_delay=1):
-    global pubmed_api_link
+# Per-source article cards, filled in with str.format_map
+_PUBMED_TEMPLATE = """
+                <div style="margin-bottom: 20px; padding: 10px; background-color: {color};">
+                    <h3>{title}</h3>
+                    <p><strong>Authors:</strong> {authors}</p>
+                    <p><strong>Journal:</strong> {journal}</p>
+                    <p><strong>Date:</strong> {date_str}</p>
+                    <p><strong>PMID:</strong> {pmid}</p>
+                    <p><strong>DOI:</strong> {doi_link}</p>
+                </div>
+                """
+_PREPRINT_TEMPLATE = """
+                <div style="margin-bottom: 20px; padding: 10px; background-color: {color};">
+                    <h3>{title}</h3>
+                    <p><strong>Authors:</strong> {authors}</p>
+                    <p><strong>Server:</strong> {server}</p>
+                    <p><strong>Date:</strong> {date_str}</p>
+                    <p><strong>DOI:</strong> {doi_link}</p>
+                </div>
+                """
+_RESEARCHSQUARE_TEMPLATE = """
+                <div style="margin-bottom: 20px; padding: 10px; background-color: {color};">
+                    <h3>{title}</h3>
+                    <p><strong>Authors:</strong> {authors}</p>
+                    <p><strong>Server:</strong> ResearchSquare</p>
+                    <p><strong>Date:</strong> {date_str}</p>
+                    <p><strong>Link:</strong> {rs_link}</p>
+                </div>
+                """
+
+# NCBI allows 3 requests/second without an API key and 10 with one
+Entrez.email = os.environ.get('NCBI_EMAIL', Entrez.email)
+Entrez.api_key = os.environ.get('NCBI_API_KEY', Entrez.api_key)
+_ncbi_lock = threading.Lock()
+_ncbi_next_slot = 0.0
+
+def _wait_for_ncbi_slot():
+    global _ncbi_next_slot
+    rate = 10 if Entrez.api_key else 3
+    with _ncbi_lock:
+        now = time.monotonic()
+        wait = _ncbi_next_slot - now
+        _ncbi_next_slot = max(now, _ncbi_next_slot) + 1 / rate
+    if wait > 0:
+        time.sleep(wait)
+
+# Shared session so repeated calls to the same hosts reuse pooled connections
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+))
+
+def _ttl_cache(ttl, maxsize=256, is_valid=lambda result: True):
+    # Memoize raw API responses for `ttl` seconds; responses failing `is_valid` are never cached
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(key)
+                if entry and now - entry[0] < ttl:
+                    return entry[1]
+            result = func(*args, **kwargs)
+            if is_valid(result):
+                with lock:
+                    # Re-insert refreshed keys at the end so dict order stays oldest-first
+                    cache.pop(key, None)
+                    # Entries share one TTL, so expired ones are always at the front
+                    while cache and now - next(iter(cache.values()))[0] >= ttl:
+                        cache.pop(next(iter(cache)))
+                    if len(cache) >= maxsize:
+                        cache.pop(next(iter(cache)))  # Evict the oldest live entry
+                    cache[key] = (now, result)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+def _retry_after(error):
+    # Retry-After may also be an HTTP date; only the delay-seconds form is honoured
+    value = error.headers.get('Retry-After') if error.headers else None
+    return int(value) if value and value.isdigit() else None
+
+def entrez_retry(max_retries=5, initial_delay=1, retry_on=(500, 429, 502, 503, 504)):
+    # Retry transient Entrez failures (listed HTTP codes, timeouts, dropped connections)
+    # with jittered exponential backoff, honouring Retry-After when NCBI sends it
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            delay = initial_delay
+            for attempt in range(max_retries):
+                try:
+                    return func(*args, **kwargs)
+                except HTTPError as e:
+                    if e.code not in retry_on or attempt == max_retries - 1:
+                        raise
+                    wait = _retry_after(e) or delay * (1 + random.random())
+                    print(f"Encountered HTTP {e.code} error. Retrying in {wait:.1f} seconds...")
+                except (URLError, TimeoutError) as e:
+                    if attempt == max_retries - 1:
+                        raise
+                    wait = delay * (1 + random.random())
+                    print(f"Encountered {str(e)}. Retrying in {wait:.1f} seconds...")
+                except Exception as e:
+                    print(f"An error occurred: {str(e)}")
+                    raise
+                time.sleep(wait)
+                delay *= 2  # Exponential backoff
+
+            raise Exception("Max retries reached. Unable to complete the request.")
+        return wrapper
+    return decorator
+
+# Catalogs update at most daily, except ResearchSquare which changes more often
+@_ttl_cache(ttl=3600, is_valid=lambda result: 'idlist' in result[0].get('esearchresult', {}))
+@entrez_retry()
+def search_pubmed(query, page, results_per_page, start_date=None):
     start = (page - 1) * results_per_page
     params = {
         "db": "pubmed",
@@ -29,137 +172,232 @@ def search_pubmed(query, page, results_per_page, max_retries=3, initial_delay=1)
         "retstart": start,
         "retmode": "json"
     }
+    if start_date:
+        # ESearch needs both bounds; future-dated papers are trimmed client-side
+        params.update({"datetype": "pdat", "mindate": start_date.strftime("%Y/%m/%d"), "maxdate": "3000"})
     pubmed_api_link = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?{urlencode(params)}"
     
-    delay = initial_delay
-    
-    for attempt in range(max_retries):
-        try:
-            handle = Entrez.esearch(db="pubmed", term=query, retmax=results_per_page, sort="date", retstart=start, retmode="json")
-            results = json.load(handle)
-            handle.close()
-            return results
-        except HTTPError as e:
-            if e.code == 500 and attempt < max_retries - 1:
-                print(f"Encountered HTTP 500 error. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-            else:
-                raise  # Re-raise the exception if it's not a 500 error or we've run out of retries
-        except Exception as e:
-            print(f"An error occurred: {str(e)}")
-            raise
-
-    raise Exception("Max retries reached. Unable to complete the request.")
-
-def fetch_pubmed_details(id_list, max_retries=3, initial_delay=1):
-    ids = ",".join(id_list)
-    delay = initial_delay
-    
-    for attempt in range(max_retries):
-        try:
-            handle = Entrez.efetch(db="pubmed", id=ids, retmode="xml")
-            results = Entrez.read(handle)
-            handle.close()
-            return results
-        except HTTPError as e:
-            if e.code == 500 and attempt < max_retries - 1:
-                print(f"Encountered HTTP 500 error. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-            else:
-                raise  # Re-raise the exception if it's not a 500 error or we've run out of retries
-        except Exception as e:
-            print(f"An error occurred: {str(e)}")
-            raise
-
-    raise Exception("Max retries reached. Unable to complete the request.")
+    _wait_for_ncbi_slot()
+    handle = Entrez.esearch(**params)
+    results = json_loads(handle.read())
+    handle.close()
+    return results, pubmed_api_link
+
+# Only the fields search_articles renders; dates are {'Year', 'Month', 'Day'} dicts
+PubmedRecord = namedtuple('PubmedRecord', ['pmid', 'title', 'authors', 'journal', 'doi',
+                                           'article_date', 'pub_date', 'abstract'])
+
+def _element_text(elem):
+    return ''.join(elem.itertext()).strip() if elem is not None else None
+
+def _element_date(elem):
+    return {child.tag: child.text for child in elem} if elem is not None else None
+
+def _parse_pubmed_article(elem):
+    citation = elem.find('MedlineCitation')
+    article = citation.find('Article')
+    doi = elem.find("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
+    return PubmedRecord(
+        pmid=citation.findtext('PMID'),
+        title=_element_text(article.find('ArticleTitle')),
+        authors=[{'LastName': author.findtext('LastName', ''), 'Initials': author.findtext('Initials', '')}
+                 for author in article.iterfind('AuthorList/Author')],
+        journal=article.findtext('Journal/Title'),
+        doi=doi.text if doi is not None else None,
+        article_date=_element_date(article.find('ArticleDate')),
+        pub_date=_element_date(article.find('Journal/JournalIssue/PubDate')),
+        abstract=' '.join(_element_text(text) for text in article.iterfind('Abstract/AbstractText'))
+    )
+
+def iter_pubmed_records(handle):
+    # Stream the EFetch XML, clearing each article once parsed so memory stays flat
+    try:
+        root = None
+        for event, elem in ET.iterparse(handle, events=('start', 'end')):
+            if root is None:
+                root = elem
+            elif event == 'end' and elem.tag == 'PubmedArticle':
+                yield _parse_pubmed_article(elem)
+                root.clear()
+    finally:
+        handle.close()
+
+# Parsed PubMed records persist across sessions; records rarely change once indexed
+_PUBMED_CACHE_PATH = os.environ.get(
+    'PUBMED_CACHE_PATH', os.path.join(os.path.expanduser('~'), '.cache', 'lc-research', 'pubmed.sqlite3'))
+_PUBMED_CACHE_TTL = 30 * 24 * 60 * 60
+# Derived from the record fields so rows written for an older PubmedRecord layout are discarded
+_PUBMED_CACHE_VERSION = zlib.crc32(','.join(PubmedRecord._fields).encode()) & 0x7FFFFFFF
+
+def _open_pubmed_cache():
+    os.makedirs(os.path.dirname(_PUBMED_CACHE_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(_PUBMED_CACHE_PATH)
+    with conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != _PUBMED_CACHE_VERSION:
+            conn.execute("DROP TABLE IF EXISTS pubmed")
+            conn.execute(f"PRAGMA user_version = {_PUBMED_CACHE_VERSION}")
+        conn.execute("CREATE TABLE IF NOT EXISTS pubmed (pmid TEXT PRIMARY KEY, fetched_at INTEGER, json BLOB)")
+    return conn
+
+def _decode_cached_record(data):
+    # Rows that fail to decode are treated as misses and fetched again
+    try:
+        return PubmedRecord(**json_loads(data))
+    except (TypeError, ValueError):
+        return None
 
+def load_cached_pubmed_records(id_list):
+    cutoff = int(time.time()) - _PUBMED_CACHE_TTL
+    records = []
+    try:
+        with closing(_open_pubmed_cache()) as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(id_list), 500):
+                chunk = id_list[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT json FROM pubmed WHERE fetched_at >= ? AND pmid IN ({','.join('?' * len(chunk))})",
+                    [cutoff, *chunk]
+                )
+                for row in rows:
+                    record = _decode_cached_record(row[0])
+                    if record is not None:
+                        records.append(record)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Unable to read PubMed cache: {str(e)}")
+    return records
+
+def store_pubmed_records(records):
+    fetched_at = int(time.time())
+    rows = [(record.pmid, fetched_at, json.dumps(record._asdict())) for record in records if record.pmid]
+    try:
+        with closing(_open_pubmed_cache()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO pubmed (pmid, fetched_at, json) VALUES (?, ?, ?)", rows)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Unable to write PubMed cache: {str(e)}")
+
+def _cache_pubmed_records(records):
+    # Pass records through as they stream in, persisting them once the response is consumed
+    fetched = []
+    for record in records:
+        fetched.append(record)
+        yield record
+    store_pubmed_records(fetched)
+
+@entrez_retry()
+def _efetch_pubmed_records(id_chunk):
+    # Parse on the worker thread so one chunk's parsing overlaps other chunks' downloads
+    _wait_for_ncbi_slot()
+    handle = Entrez.efetch(db="pubmed", id=",".join(id_chunk), retmode="xml")
+    return list(iter_pubmed_records(handle))
+
+def _stream_chunk_results(chunks, max_workers):
+    # The pool lives inside the generator so it is only created once iteration
+    # starts and is always shut down when iteration ends or is abandoned
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)))
+    try:
+        futures = [executor.submit(_efetch_pubmed_records, chunk) for chunk in chunks]
+        # Yield records chunk by chunk in completion order
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def fetch_pubmed_details(id_list, chunk_size=50, max_workers=4):
+    if not id_list:
+        return iter(())
+
+    cached = load_cached_pubmed_records(id_list)
+    cached_ids = {record.pmid for record in cached}
+    missing = [pmid for pmid in id_list if pmid not in cached_ids]
+    if not missing:
+        return iter(cached)
+
+    # Fetch misses in concurrent chunks once the caller starts consuming;
+    # the rate limiter still applies to each chunk
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    return chain(cached, _cache_pubmed_records(_stream_chunk_results(chunks, max_workers)))
+
+@_ttl_cache(ttl=3600, is_valid=lambda result: 'collection' in result[0])
 def search_preprints(query, page, results_per_page):
-    global preprint_api_link
     start = (page - 1) * results_per_page
     preprint_api_link = f"https://api.biorxiv.org/covid19/{start}/{results_per_page}?text={query}"
     
     base_url = "https://api.biorxiv.org/covid19"
     url = f"{base_url}/{start}/{results_per_page}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
     params = {'text': query}
-    response = requests.get(url, headers=headers, params=params)
-    return response.json()
-
-def format_author_list(authors):
-    def format_author(author):
-        last_name = author.get('LastName', '')
-        initials = author.get('Initials', '')
-        if last_name and initials:
-            return f"{last_name} {initials}"
-        elif last_name:
-            return last_name
-        elif initials:
-            return initials
-        else:
-            return "Unknown Author"
+    response = _SESSION.get(url, params=params)
+    return json_loads(response.content), preprint_api_link
+
+def format_author_list(authors, max_authors=5):
+    formatted = ", ".join(
+        " ".join(filter(None, (author.get('LastName'), author.get('Initials')))) or "Unknown Author"
+        for author in authors[:max_authors]
+    )
+    if len(authors) > max_authors:
+        return formatted + ", et al."
+    return formatted
 
-    if len(authors) > 5:
-        return ", ".join(format_author(author) for author in authors[:5]) + ", et al."
-    return ", ".join(format_author(author) for author in authors)
+# Matches "YYYY", "YYYY-MM" and "YYYY-MM-DD"
+_DATE_PATTERN = re.compile(r'(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?')
+
+# PubMed writes journal PubDate months as "Jan".."Dec"
+_MONTH_ABBREVIATIONS = {name: f"{number:02d}" for number, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1)}
 
 def parse_date(date_obj):
     if isinstance(date_obj, dict):
         year = date_obj.get('Year')
         month = date_obj.get('Month', '01')
+        month = _MONTH_ABBREVIATIONS.get(month, month)
         day = date_obj.get('Day', '01')
         date_str = f"{year}-{month}-{day}"
     else:
         date_str = date_obj
     
+    match = _DATE_PATTERN.fullmatch(date_str)
+    if not match:
+        return None
+    year, month, day = match.groups()
     try:
-        parsed_date = datetime.strptime(date_str, "%Y-%m-%d")
-        return parsed_date
+        return datetime(int(year), int(month or 1), int(day or 1))
     except ValueError:
-        try:
-            return datetime.strptime(date_str, "%Y-%m")
-        except ValueError:
-            try:
-                return datetime.strptime(date_str, "%Y")
-            except ValueError:
-                return None
-
-def get_color_by_date(date):
+        return None
+
+def get_color_thresholds(current_date, days=(7, 30)):
+    # "(current_date - date).days <= n" is the same as "date > current_date - (n + 1) days"
+    return tuple(current_date - timedelta(days=n + 1) for n in days)
+
+def get_color_by_date(date, three_day_cutoff, week_cutoff):
+    # Cutoffs come from get_color_thresholds(current_date, days=(3, 7))
     if date is None:
         return RED
-    days_ago = (datetime.now() - date).days
-    if days_ago <= 3:
+    if date > three_day_cutoff:
         return GREEN
-    elif days_ago <= 7:
+    elif date > week_cutoff:
         return YELLOW
     else:
         return RED
 
-def get_matching_queries(text, queries):
-    return [q for q in queries if q.lower() in text.lower()]
+def get_matching_queries(text_lower, queries_lower, queries):
+    # Callers lowercase the text and queries once rather than per comparison
+    return [queries[i] for i, query_lower in enumerate(queries_lower) if query_lower in text_lower]
 
-def filter_articles_by_timeframe(articles, timeframe):
+def get_timeframe_start(timeframe):
     today = datetime.now().date()
     if timeframe == "today":
-        start_date = today
+        return today
     elif timeframe == "week":
-        start_date = today - timedelta(days=7)
+        return today - timedelta(days=7)
     elif timeframe == "month":
-        start_date = today - timedelta(days=30)
-    else:
-        return articles  # Return all articles if timeframe is not recognized
-
-    return [article for article in articles if article['date'].date() >= start_date]
+        return today - timedelta(days=30)
+    return None  # No lower bound if timeframe is not recognized
 
+@_ttl_cache(ttl=300, is_valid=lambda result: 'data' in result[0].get('result', {}))
 def search_researchsquare(query, page, results_per_page, timeframe=None):
-    global researchsquare_api_link
     base_url = "https://www.researchsquare.com/api/search"
     
     end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-    start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    start_date = (get_timeframe_start(timeframe) or datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
     
     params = {
         "unified": query,
@@ -170,130 +408,160 @@ def search_researchsquare(query, page, results_per_page, timeframe=None):
     }
     researchsquare_api_link = f"{base_url}?{urlencode(params)}"
     
-    response = requests.get(base_url, params=params)
-    return response.json()
+    response = _SESSION.get(base_url, params=params)
+    return json_loads(response.content), researchsquare_api_link
 
-def get_researchsquare_color(date):
-    days_ago = (datetime.now() - date).days
-    if days_ago <= 7:
+def get_researchsquare_color(date, week_cutoff, month_cutoff):
+    if date > week_cutoff:
         return '#8FBC8F'  # Dark Sea Green (less bright)
-    elif days_ago <= 30:
+    elif date > month_cutoff:
         return '#DEB887'  # Burlywood (less bright)
     else:
         return '#CD5C5C'  # Indian Red (less bright)
 
-def search_articles(query, page=1, results_per_page=100, timeframe=None, max_future_months=6):
-    pubmed_results = search_pubmed(query, page, results_per_page)
-    pubmed_papers = fetch_pubmed_details(pubmed_results['esearchresult']['idlist'])
-    preprint_results = search_preprints(query, page, results_per_page)
-    researchsquare_results = search_researchsquare(query, page, results_per_page, timeframe)
-
-    all_articles = []
-    current_date = datetime.now()
-    max_future_date = current_date + timedelta(days=30 * max_future_months)
+def get_pubmed_color(date, week_cutoff, month_cutoff):
+    if date > week_cutoff:
+        return '#2E8B57'  # Sea Green (darker)
+    elif date > month_cutoff:
+        return '#DAA520'  # Goldenrod
+    else:
+        return '#B22222'  # Firebrick (darker red)
 
-    def is_valid_date(date):
-        return current_date - timedelta(days=365*5) <= date <= max_future_date
+def get_preprint_color(date, week_cutoff, month_cutoff):
+    if date > week_cutoff:
+        return '#98FB98'  # Pale Green (lighter)
+    elif date > month_cutoff:
+        return '#FAFAD2'  # Light Goldenrod Yellow
+    else:
+        return '#FFA07A'  # Light Salmon
 
-    def get_pubmed_color(date):
-        days_ago = (current_date - date).days
-        if days_ago <= 7:
-            return '#2E8B57'  # Sea Green (darker)
-        elif days_ago <= 30:
-            return '#DAA520'  # Goldenrod
-        else:
-            return '#B22222'  # Firebrick (darker red)
-
-    def get_preprint_color(date):
-        days_ago = (current_date - date).days
-        if days_ago <= 7:
-            return '#98FB98'  # Pale Green (lighter)
-        elif days_ago <= 30:
-            return '#FAFAD2'  # Light Goldenrod Yellow
-        else:
-            return '#FFA07A'  # Light Salmon
+def process_pubmed_papers(pubmed_papers, queries, current_date, max_future_date, start_date=None, source_api=None):
+    articles = []
+    min_date = current_date - timedelta(days=365*5)
+    week_cutoff, month_cutoff = get_color_thresholds(current_date)
+    queries_lower = [query.lower() for query in queries]
 
-    # Process PubMed results
-    for paper in pubmed_papers['PubmedArticle']:
+    for paper in pubmed_papers:
         try:
-            # Extract date - Updated logic
-            article_date = None
-            
-            # First try to get the electronic publication date
-            if 'ArticleDate' in paper['MedlineCitation']['Article']:
-                article_dates = paper['MedlineCitation']['Article']['ArticleDate']
-                if article_dates:
-                    date_dict = article_dates[0]
-                    article_date = datetime(int(date_dict['Year']), 
-                                         int(date_dict['Month']), 
-                                         int(date_dict['Day']))
-            
-            # If no electronic date, try publication date
-            if not article_date and 'PubDate' in paper['MedlineCitation']['Article']['Journal']:
-                pub_date = paper['MedlineCitation']['Article']['Journal']['PubDate']
-                if all(key in pub_date for key in ['Year', 'Month', 'Day']):
-                    article_date = datetime(int(pub_date['Year']),
-                                         int(pub_date['Month']),
-                                         int(pub_date['Day']))
-                elif all(key in pub_date for key in ['Year', 'Month']):
-                    article_date = datetime(int(pub_date['Year']),
-                                         int(pub_date['Month']),
-                                         1)
-                elif 'Year' in pub_date:
-                    article_date = datetime(int(pub_date['Year']), 1, 1)
-            
+            # Prefer the electronic publication date, falling back to the
+            # journal publication date (missing month/day default to 1)
+            article_date = parse_date(paper.article_date) if paper.article_date else None
+            if not article_date and paper.pub_date:
+                article_date = parse_date(paper.pub_date)
+
             if not article_date:
                 continue
 
-            if not is_valid_date(article_date):
+            if not min_date <= article_date <= max_future_date:
+                continue
+
+            if start_date and article_date.date() < start_date:
                 continue
 
-            color = get_pubmed_color(article_date)
+            color = get_pubmed_color(article_date, week_cutoff, month_cutoff)
 
             # Extract other information
-            article = paper.get('MedlineCitation', {}).get('Article', {})
-            title = article.get('ArticleTitle', 'No Title Available')
-            authors = ', '.join([f"{author.get('LastName', '')} {author.get('Initials', '')}" 
-                                 for author in article.get('AuthorList', [])[:3]])
-            if len(article.get('AuthorList', [])) > 3:
-                authors += ' et al.'
-            journal = article.get('Journal', {}).get('Title', 'Unknown Journal')
-            pmid = paper.get('MedlineCitation', {}).get('PMID', 'Unknown PMID')
+            title = paper.title or 'No Title Available'
+            authors = format_author_list(paper.authors, max_authors=3)
+            journal = paper.journal or 'Unknown Journal'
+            pmid = paper.pmid or 'Unknown PMID'
             
-            # Extract DOI
-            article_id_list = paper.get('PubmedData', {}).get('ArticleIdList', [])
-            doi = next((id_obj for id_obj in article_id_list if id_obj.attributes.get('IdType') == 'doi'), None)
+            doi = paper.doi
             doi_link = f'<a href="https://doi.org/{doi}" target="_blank">{doi}</a>' if doi else 'Not available'
 
             date_str = article_date.strftime("%Y-%m-%d")
 
-            all_articles.append({
+            # A single query needs no attribution; for batched searches match
+            # against title and abstract. Articles PubMed matched only through
+            # term expansion can't be tied to a query, so they are labelled as such
+            if len(queries) == 1:
+                matching_queries = list(queries)
+            else:
+                text_lower = f"{title} {paper.abstract}".lower()
+                matching_queries = (get_matching_queries(text_lower, queries_lower, queries)
+                                    or [PUBMED_EXPANDED_MATCH])
+
+            articles.append({
                 'date': article_date,
+                'title': title,
                 'color': color,
-                'html': f"""
-                <div style="margin-bottom: 20px; padding: 10px; background-color: {color};">
-                    <h3>{title}</h3>
-                    <p><strong>Authors:</strong> {authors}</p>
-                    <p><strong>Journal:</strong> {journal}</p>
-                    <p><strong>Date:</strong> {date_str}</p>
-                    <p><strong>PMID:</strong> {pmid}</p>
-                    <p><strong>DOI:</strong> {doi_link}</p>
-                </div>
-                """,
-                'query': query
+                'html': _PUBMED_TEMPLATE.format_map({
+                    'color': color, 'title': title, 'authors': authors, 'journal': journal,
+                    'date_str': date_str, 'pmid': pmid, 'doi_link': doi_link
+                }),
+                'queries': matching_queries,
+                'source_api': source_api
             })
         except Exception as e:
             continue
 
+    return articles
+
+def search_pubmed_batch(queries, page, results_per_page, start_date=None):
+    # One ESearch for the disjunction of all queries instead of one per query
+    if not queries:
+        return {'esearchresult': {'idlist': []}}, None
+    term = " OR ".join(f"({query})" for query in queries)
+    return search_pubmed(term, page, results_per_page * len(queries), start_date)
+
+def search_pubmed_articles(queries, page=1, results_per_page=100, timeframe=None, max_future_months=6):
+    if not queries:
+        return []
+
+    start_date = get_timeframe_start(timeframe)
+    pubmed_results, pubmed_api_link = search_pubmed_batch(queries, page, results_per_page, start_date)
+    pubmed_papers = fetch_pubmed_details(pubmed_results['esearchresult']['idlist'])
+
+    current_date = datetime.now()
+    max_future_date = current_date + timedelta(days=30 * max_future_months)
+    return process_pubmed_papers(pubmed_papers, queries, current_date, max_future_date, start_date,
+                                 source_api=pubmed_api_link)
+
+def search_articles(query, page=1, results_per_page=100, timeframe=None, max_future_months=6, include_pubmed=True):
+    # Articles outside the timeframe are skipped before any formatting work
+    start_date = get_timeframe_start(timeframe)
+
+    # The sources are independent, so query them concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        if include_pubmed:
+            pubmed_future = executor.submit(search_pubmed, query, page, results_per_page, start_date)
+        preprint_future = executor.submit(search_preprints, query, page, results_per_page)
+        researchsquare_future = executor.submit(search_researchsquare, query, page, results_per_page, timeframe)
+
+        if include_pubmed:
+            pubmed_results, pubmed_api_link = pubmed_future.result()
+            # fetch_pubmed_details is lazy, so drain it on the pool to overlap
+            # the EFetch downloads with the preprint searches still in flight
+            details_future = executor.submit(lambda ids: list(fetch_pubmed_details(ids)),
+                                             pubmed_results['esearchresult']['idlist'])
+
+        preprint_results, preprint_api_link = preprint_future.result()
+        researchsquare_results, researchsquare_api_link = researchsquare_future.result()
+        if include_pubmed:
+            pubmed_papers = details_future.result()
+
+    all_articles = []
+    current_date = datetime.now()
+    max_future_date = current_date + timedelta(days=30 * max_future_months)
+
+    min_date = current_date - timedelta(days=365*5)
+    week_cutoff, month_cutoff = get_color_thresholds(current_date)
+
+    if include_pubmed:
+        all_articles.extend(process_pubmed_papers(pubmed_papers, [query], current_date, max_future_date, start_date,
+                                                  source_api=pubmed_api_link))
+
     # Process Preprint results
     for paper in preprint_results['collection']:
         try:
-            date_posted = datetime.strptime(paper['date'], '%Y-%m-%d')
-            if not is_valid_date(date_posted):
+            date_posted = datetime.fromisoformat(paper['date'])
+            if not min_date <= date_posted <= max_future_date:
+                continue
+            if start_date and date_posted.date() < start_date:
                 continue
-            color = get_preprint_color(date_posted)
+            color = get_preprint_color(date_posted, week_cutoff, month_cutoff)
 
-            title = paper.get('title', 'No Title Available')
+            title = paper.get('title') or 'No Title Available'
             authors = ', '.join([author.get('name', 'Unknown Author') for author in paper.get('authors', [])[:3]])
             if len(paper.get('authors', [])) > 3:
                 authors += ' et al.'
@@ -305,17 +573,14 @@ def search_articles(query, page=1, results_per_page=100, timeframe=None, max_fut
 
             all_articles.append({
                 'date': date_posted,
+                'title': title,
                 'color': color,
-                'html': f"""
-                <div style="margin-bottom: 20px; padding: 10px; background-color: {color};">
-                    <h3>{title}</h3>
-                    <p><strong>Authors:</strong> {authors}</p>
-                    <p><strong>Server:</strong> {server}</p>
-                    <p><strong>Date:</strong> {date_str}</p>
-                    <p><strong>DOI:</strong> {doi_link}</p>
-                </div>
-                """,
-                'query': query
+                'html': _PREPRINT_TEMPLATE.format_map({
+                    'color': color, 'title': title, 'authors': authors, 'server': server,
+                    'date_str': date_str, 'doi_link': doi_link
+                }),
+                'queries': [query],
+                'source_api': preprint_api_link
             })
         except Exception as e:
             continue
@@ -323,12 +588,14 @@ def search_articles(query, page=1, results_per_page=100, timeframe=None, max_fut
     # Process ResearchSquare results
     for paper in researchsquare_results['result']['data']:
         try:
-            date_posted = datetime.strptime(paper['posted_at'], '%Y-%m-%d %H:%M:%S')
-            if not is_valid_date(date_posted):
+            date_posted = datetime.fromisoformat(paper['posted_at'])
+            if not min_date <= date_posted <= max_future_date:
                 continue
-            color = get_researchsquare_color(date_posted)
+            if start_date and date_posted.date() < start_date:
+                continue
+            color = get_researchsquare_color(date_posted, week_cutoff, month_cutoff)
 
-            title = paper.get('title', 'No Title Available')
+            title = paper.get('title') or 'No Title Available'
             authors = ', '.join([author.strip() for author in paper.get('authors', '').split(',')[:3]])
             if len(paper.get('authors', '').split(',')) > 3:
                 authors += ' et al.'
@@ -340,47 +607,48 @@ def search_articles(query, page=1, results_per_page=100, timeframe=None, max_fut
 
             all_articles.append({
                 'date': date_posted,
+                'title': title,
                 'color': color,
-                'html': f"""
-                <div style="margin-bottom: 20px; padding: 10px; background-color: {color};">
-                    <h3>{title}</h3>
-                    <p><strong>Authors:</strong> {authors}</p>
-                    <p><strong>Server:</strong> ResearchSquare</p>
-                    <p><strong>Date:</strong> {date_str}</p>
-                    <p><strong>Link:</strong> {rs_link}</p>
-                </div>
-                """,
-                'query': query
+                'html': _RESEARCHSQUARE_TEMPLATE.format_map({
+                    'color': color, 'title': title, 'authors': authors,
+                    'date_str': date_str, 'rs_link': rs_link
+                }),
+                'queries': [query],
+                'source_api': researchsquare_api_link
             })
         except Exception as e:
             print(f"Error processing ResearchSquare paper: {str(e)}")
             continue
 
-    # Filter articles based on timeframe
-    if timeframe:
-        all_articles = filter_articles_by_timeframe(all_articles, timeframe)
-
     return all_articles
 
 def combine_and_display_results(queries, page=1, results_per_page=200, timeframe=None, max_future_months=6):
     all_results = []
     seen_titles = {}  # Dictionary to track unique titles and their queries
     
-    for query in queries:
-        results = search_articles(query, page, results_per_page, timeframe, max_future_months)
-        for result in results:
-            # Extract title from the HTML content
-            title_start = result['html'].find('<h3>') + 4
-            title_end = result['html'].find('</h3>')
-            title = result['html'][title_start:title_end].strip()
-            
-            if title in seen_titles:
-                # If we've seen this title before, append the new query
-                seen_titles[title]['queries'].append(query)
-            else:
-                # If this is a new title, add it to our tracking
-                result['queries'] = [query]
-                seen_titles[title] = result
+    # PubMed supports boolean OR, so all queries go out as a single batched search;
+    # the preprint servers don't, so those still run once per query
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(queries) + 1))) as executor:
+        pubmed_future = executor.submit(search_pubmed_articles, queries, page, results_per_page, timeframe, max_future_months)
+        futures = [executor.submit(search_articles, query, page, results_per_page, timeframe, max_future_months, False)
+                   for query in queries]
+
+    # Merge in query order so duplicate handling is deterministic
+    results = pubmed_future.result()
+    for future in futures:
+        results.extend(future.result())
+
+    for result in results:
+        # Normalize so case and whitespace variants of a title are treated as one
+        title = result['title'].casefold().strip()
+
+        if title in seen_titles:
+            # If we've seen this title before, add any new queries
+            seen = seen_titles[title]['queries']
+            seen.extend(q for q in result['queries'] if q not in seen)
+        else:
+            # If this is a new title, add it to our tracking
+            seen_titles[title] = result
     
     # Convert the dictionary values back to a list
     all_results = list(seen_titles.values())
@@ -388,23 +656,22 @@ def combine_and_display_results(queries, page=1, results_per_page=200, timeframe
     # Sort all articles by date, most recent first
     all_results.sort(key=lambda x: x['date'], reverse=True)
 
-    # Generate HTML output
-    html_output = f"""
+    # Generate HTML output, collecting fragments and joining once at the end
+    html_parts = [f"""
     <h3>Search terms: {', '.join(queries)}</h3>
     <p>{len(all_results)} total results</p>
     <p>Page {page}</p>
     <p>Timeframe: {timeframe if timeframe else 'All time'}</p>
-    """
+    """]
 
-    for article in all_results:
-        html_output += f"""
+    html_parts.extend(f"""
         <div style="margin-bottom: 20px; padding: 10px; background-color: {article['color']};">
             {article['html']}
             <p><strong>Matching Queries:</strong> {', '.join(article['queries'])}</p>
         </div>
-        """
+        """ for article in all_results)
 
-    display(HTML(html_output))
+    display(HTML(''.join(html_parts)))
 
 # Example usage:
 # search_and_display_articles("long covid", page=1, results_per_page=200)